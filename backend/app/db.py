@@ -9,11 +9,13 @@ DB_PASSWORD = "Barrister@2022"  # Empty since you said no password
 DB_HOST = "localhost"
 DB_PORT = "5432"
 
-def get_db_connection():
+def get_db_connection(**options):
+    # options are passed through to psycopg2.connect (e.g. connect_timeout)
     return psycopg2.connect(
         dbname=os.getenv("POSTGRES_DB", "pyitupy"),
         user=os.getenv("POSTGRES_USER", "postgres"),
         password=os.getenv("POSTGRES_PASSWORD", "Barrister@2022"),  # change to your real password
         host=os.getenv("POSTGRES_HOST", "localhost"),
-        port=os.getenv("POSTGRES_PORT", "5432")
+        port=os.getenv("POSTGRES_PORT", "5432"),
+        **options
     )
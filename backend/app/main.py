@@ -1,7 +1,9 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from app.routes import kyc, credit_score, auth
+from app.routes import kyc, credit_score, auth, portfolio
 from app.db import get_db_connection  # Database connection
+from app.services.kyc_store import writer as kyc_writer
+from app.services import portfolio as portfolio_service
 from pydantic import BaseModel
 from web3 import Web3
 import os
@@ -22,6 +24,17 @@ w3 = Web3(Web3.HTTPProvider(ETH_RPC_URL))
 app = FastAPI(title="Pyitupy Backend API", version="1.0")
 
 
+@app.on_event("startup")
+def start_kyc_writer():
+    kyc_writer.start()
+
+
+@app.on_event("shutdown")
+def stop_kyc_writer():
+    # Flush queued KYC submissions before the process exits
+    kyc_writer.stop()
+
+
 @app.get("/")
 def home():
     return {"status": "ok", "message": "Welcome to the Pyitupy Backend API"}
@@ -112,6 +125,9 @@ def fund_loan(loan_id: int, amount: float, lender_wallet: str = "0xSampleLenderW
         (loan_id, lender_wallet, amount),
     )
     conn.commit()
+
+    # Keep the in-memory loan book in step with the funding table
+    portfolio_service.refresh_funding(conn, loan_id)
     conn.close()
 
     return {"status": "success", "message": f"Loan {loan_id} funded with {amount}"}
@@ -165,10 +181,12 @@ def verify_payment(data: VerifyPaymentRequest):
 # ============================
 # Register Routes
 # ============================
-# Includes KYC endpoints (individual + business), credit scoring, and authentication
+# Includes KYC endpoints (individual + business), credit scoring, authentication
+# and lender portfolio matching
 app.include_router(kyc.router, prefix="/kyc", tags=["KYC"])
 app.include_router(credit_score.router, prefix="/credit-score", tags=["Credit Score"])
 app.include_router(auth.router, prefix="/auth", tags=["Auth"])
+app.include_router(portfolio.router, prefix="/portfolio", tags=["Portfolio"])
 
 # ============================
 # Middleware
@@ -1,12 +1,17 @@
-from fastapi import APIRouter, File, UploadFile, Form, HTTPException
+from fastapi import APIRouter, Depends, File, UploadFile, Form, Header, HTTPException
 from typing import List, Optional
 from datetime import datetime, timedelta
-import os, json, httpx
+import json, os, secrets, httpx
+from app.services.kyc_store import writer, latest_submission
 
 router = APIRouter()
 
 STORAGE_SERVICE_URL = "http://localhost:4000/storage/upload"
 
+# Lookups return full KYC records, so they are only served to callers that
+# send this token in the X-Admin-Token header. Unset disables the lookups.
+KYC_ADMIN_TOKEN = os.getenv("KYC_ADMIN_TOKEN")
+
 async def upload_to_storage(file: UploadFile) -> str:
     """Send file to storage service and return rootHash."""
     try:
@@ -64,18 +69,14 @@ async def submit_individual_kyc(
         "files": saved_files
     }
 
-    # still saving metadata locally (optional)
-    user_folder = os.path.join("uploads", "individuals", full_name.replace(" ", "_"))
-    os.makedirs(user_folder, exist_ok=True)
-    meta_file_path = os.path.join(user_folder, f"{timestamp}_metadata.json")
-    with open(meta_file_path, "w", encoding="utf-8") as mf:
-        json.dump(metadata, mf, indent=4)
+    # persisted to kyc_submissions by the background writer
+    writer.enqueue("individual", metadata)
 
     return {
         "status": "success",
         "message": f"KYC data for {full_name} submitted successfully.",
         "files_saved": saved_files,
-        "metadata_file": meta_file_path
+        "timestamp": timestamp
     }
 
 # =========================
@@ -110,6 +111,8 @@ async def submit_business_kyc(
     business_name: str = Form(...),
     business_type: str = Form(...),  # 'sole_proprietorship' | 'llc' | 'llp'
     owners_json: str = Form(...),    # JSON array of owner metadata
+    business_email: str = Form(...),
+    business_phone: str = Form(...),
     # business-level files
     registration_certificate: Optional[UploadFile] = File(None),
     geotagged_business_photo: Optional[UploadFile] = File(None),
@@ -212,6 +215,20 @@ async def submit_business_kyc(
             "metadata": owner_meta
         })
 
+    metadata = {
+        "business_name": business_name,
+        "business_type": business_type,
+        "business_email": business_email,
+        "business_phone": business_phone,
+        "company_cr12_date": company_cr12_date,
+        "timestamp": timestamp,
+        "files": saved_business_files,
+        "owners": saved_owners
+    }
+
+    # persisted to kyc_submissions by the background writer
+    writer.enqueue("business", metadata)
+
     return {
         "status": "success",
         "business_name": business_name,
@@ -219,3 +236,36 @@ async def submit_business_kyc(
         "saved_business_files": saved_business_files,
         "owners": saved_owners
     }
+
+# =========================
+# KYC Lookup Endpoints
+# =========================
+
+def require_admin_token(x_admin_token: Optional[str] = Header(None)):
+    if not KYC_ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="KYC lookups are disabled")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, KYC_ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+def find_latest(borrower_type: str, name: Optional[str], email: Optional[str], phone: Optional[str]) -> dict:
+    """Look up the latest submission by the first of name, email or phone given."""
+    lookups = [("name", name), ("email", email), ("phone", phone)]
+    given = [(column, value) for column, value in lookups if value]
+    if not given:
+        raise HTTPException(status_code=400, detail="Provide one of name, email or phone")
+
+    column, value = given[0]
+    submission = latest_submission(borrower_type, column, value)
+    if not submission:
+        raise HTTPException(status_code=404, detail=f"No {borrower_type} KYC found for {column} {value}")
+    return submission
+
+@router.get("/kyc/individual/latest", dependencies=[Depends(require_admin_token)])
+def get_latest_individual_kyc(name: Optional[str] = None, email: Optional[str] = None, phone: Optional[str] = None):
+    """Fetch the most recent individual KYC submission for a borrower."""
+    return find_latest("individual", name, email, phone)
+
+@router.get("/kyc/business/latest", dependencies=[Depends(require_admin_token)])
+def get_latest_business_kyc(name: Optional[str] = None, email: Optional[str] = None, phone: Optional[str] = None):
+    """Fetch the most recent business KYC submission for a borrower."""
+    return find_latest("business", name, email, phone)
@@ -0,0 +1,115 @@
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
+from typing import Optional
+import numpy as np
+
+from app.services.portfolio import (
+    RISK_LEVEL_MAX_PD,
+    amortization_schedule,
+    expected_loss,
+    get_book,
+    save_probability_of_default,
+)
+
+router = APIRouter()
+
+# ====================
+# Request Schemas
+# ====================
+class MatchRequest(BaseModel):
+    budget: float = Field(..., gt=0)
+    risk_level: Optional[str] = None  # 'low' | 'medium' | 'high' | 'very high'
+    max_probability_of_default: Optional[float] = Field(None, ge=0, le=1)
+    min_rate: float = 0.0
+    max_rate: Optional[float] = None
+    max_repayment_period: Optional[int] = None
+    max_share_per_loan: float = Field(0.1, gt=0, le=1)  # diversification cap
+    max_loans: Optional[int] = Field(None, gt=0)
+    min_expected_yield: Optional[float] = None  # lifetime return per unit lent
+
+
+class ProbabilityOfDefaultRequest(BaseModel):
+    probability_of_default: float = Field(..., ge=0, le=1)
+
+
+# ====================
+# Portfolio Endpoints
+# ====================
+@router.get("/summary")
+def get_portfolio_summary():
+    """Expected loss and lifetime yield across all open loans."""
+    return get_book().summary()
+
+
+@router.post("/match")
+def match_lender_budget(req: MatchRequest):
+    """Propose how to split a lender's budget across open loans.
+
+    Nothing is funded here; the lender funds each allocation via /loans/fund.
+    """
+    max_pd = 1.0
+    if req.risk_level:
+        risk_level = req.risk_level.lower().strip()
+        if risk_level not in RISK_LEVEL_MAX_PD:
+            raise HTTPException(status_code=400, detail=f"risk_level must be one of {list(RISK_LEVEL_MAX_PD)}")
+        max_pd = RISK_LEVEL_MAX_PD[risk_level]
+    if req.max_probability_of_default is not None:
+        max_pd = min(max_pd, req.max_probability_of_default)
+
+    return get_book().match(
+        req.budget,
+        max_pd=max_pd,
+        min_rate=req.min_rate,
+        max_rate=req.max_rate,
+        max_repayment_period=req.max_repayment_period,
+        max_share_per_loan=req.max_share_per_loan,
+        max_loans=req.max_loans,
+        min_expected_yield=req.min_expected_yield,
+    )
+
+
+@router.get("/loans/{loan_id}/schedule")
+def get_amortization_schedule(loan_id: int):
+    """Monthly amortization schedule and expected loss for a loan."""
+    loan = get_book().view(loan_id)
+    if not loan:
+        raise HTTPException(status_code=404, detail="Loan not found")
+
+    schedule = amortization_schedule(
+        np.array([loan["amount"]]), np.array([loan["rate"]]), np.array([loan["repayment_period"]])
+    )
+    months = [
+        {
+            "month": month + 1,
+            "payment": round(float(schedule["payment"][0, month]), 2),
+            "interest": round(float(schedule["interest"][0, month]), 2),
+            "principal": round(float(schedule["principal"][0, month]), 2),
+            "balance": round(float(schedule["balance"][0, month]), 2),
+        }
+        for month in range(loan["repayment_period"])
+    ]
+    return {
+        **loan,
+        "expected_loss": round(float(expected_loss(loan["remaining"], loan["probability_of_default"])), 2),
+        "total_interest": round(float(schedule["interest"].sum()), 2),
+        "schedule": months,
+    }
+
+
+@router.put("/loans/{loan_id}/probability-of-default")
+def set_probability_of_default(loan_id: int, req: ProbabilityOfDefaultRequest):
+    """Store a probability of default from the credit-score router on a loan."""
+    if not save_probability_of_default(loan_id, req.probability_of_default):
+        raise HTTPException(status_code=404, detail="Loan not found")
+    return {"status": "success", "loan_id": loan_id, "probability_of_default": req.probability_of_default}
+
+
+@router.post("/reload")
+def reload_portfolio():
+    """Rebuild the loan book from the database.
+
+    Required after loans are listed or change status: only funding updates
+    the book incrementally.
+    """
+    book = get_book(reload=True)
+    return {"status": "success", "loan_count": len(book)}
@@ -0,0 +1,298 @@
+# app/services/kyc_store.py
+import json
+import os
+import queue
+import re
+import threading
+import time
+from datetime import datetime
+
+from psycopg2.extras import Json, execute_values
+
+from app.db import get_db_connection
+
+TIMESTAMP_FORMAT = "%Y%m%d%H%M%S"
+
+# Writer tuning: flush when BATCH_SIZE rows are queued or FLUSH_INTERVAL
+# seconds have passed since the first queued row, whichever comes first.
+BATCH_SIZE = 100
+FLUSH_INTERVAL = 2.0
+
+# Failed inserts are retried with exponential backoff, then written to
+# FALLBACK_DIR in the uploads/<folder>/<name>/<timestamp>_metadata.json
+# layout that migrations.load_kyc_metadata reloads.
+MAX_ATTEMPTS = 5
+RETRY_BACKOFF = 1.0
+FALLBACK_DIR = "uploads"
+
+# Bounds on how long one writer attempt can block, so shutdown can rely on
+# the writer thread finishing its in-flight batch.
+WRITER_CONNECTION_OPTIONS = {
+    "connect_timeout": 5,
+    "options": "-c statement_timeout=10000",
+}
+BORROWER_FOLDERS = {"individual": "individuals", "business": "businesses"}
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS kyc_submissions (
+    id BIGSERIAL PRIMARY KEY,
+    borrower_type TEXT NOT NULL,
+    name TEXT NOT NULL,
+    email TEXT,
+    phone TEXT,
+    submitted_at TIMESTAMP NOT NULL,
+    data JSONB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS kyc_submissions_name_idx
+    ON kyc_submissions (borrower_type, lower(name), submitted_at DESC);
+CREATE INDEX IF NOT EXISTS kyc_submissions_email_idx
+    ON kyc_submissions (borrower_type, lower(email), submitted_at DESC);
+CREATE INDEX IF NOT EXISTS kyc_submissions_phone_idx
+    ON kyc_submissions (borrower_type, phone, submitted_at DESC);
+CREATE INDEX IF NOT EXISTS kyc_submissions_submitted_at_idx
+    ON kyc_submissions (submitted_at DESC);
+"""
+
+INSERT_SQL = """
+    INSERT INTO kyc_submissions (borrower_type, name, email, phone, submitted_at, data)
+    VALUES %s
+"""
+
+# Lookup column -> SQL expression matching the index above
+LOOKUP_COLUMNS = {
+    "name": "lower(name) = lower(%s)",
+    "email": "lower(email) = lower(%s)",
+    "phone": "phone = %s",
+}
+
+
+def ensure_schema(conn=None):
+    """Create the kyc_submissions table and its indexes if missing."""
+    owns_conn = conn is None
+    conn = conn or get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(SCHEMA_SQL)
+        conn.commit()
+    finally:
+        if owns_conn:
+            conn.close()
+
+
+def build_row(borrower_type: str, metadata: dict) -> tuple:
+    """Turn a submission's metadata dict into a kyc_submissions row."""
+    if borrower_type == "individual":
+        name = metadata.get("full_name")
+        email = metadata.get("email_address")
+        phone = metadata.get("telephone_number")
+    else:
+        name = metadata.get("business_name")
+        email = metadata.get("business_email")
+        phone = metadata.get("business_phone")
+    if not name:
+        raise ValueError(f"{borrower_type} submission has no name")
+    submitted_at = datetime.strptime(metadata["timestamp"], TIMESTAMP_FORMAT)
+    return (borrower_type, name, email, phone, submitted_at, Json(metadata))
+
+
+def insert_rows(rows: list, conn=None):
+    """Bulk insert prepared rows in a single statement."""
+    if not rows:
+        return
+    owns_conn = conn is None
+    conn = conn or get_db_connection()
+    try:
+        cursor = conn.cursor()
+        execute_values(cursor, INSERT_SQL, rows, page_size=BATCH_SIZE)
+        conn.commit()
+    finally:
+        if owns_conn:
+            conn.close()
+
+
+def write_fallback(borrower_type: str, metadata: dict) -> str:
+    """Save a submission as a local metadata file for the migration to reload."""
+    name = metadata.get("full_name") or metadata.get("business_name") or "unknown"
+    folder = os.path.join(FALLBACK_DIR, BORROWER_FOLDERS[borrower_type], re.sub(r"[^\w.-]", "_", name))
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, f"{metadata['timestamp']}_metadata.json")
+    with open(path, "w", encoding="utf-8") as mf:
+        json.dump(metadata, mf, indent=4)
+    return path
+
+
+class SubmissionWriter:
+    """Background writer that batches KYC submissions into Postgres.
+
+    Request handlers call `enqueue`, which only puts the submission on a
+    queue; a single daemon thread creates the schema, drains the queue and
+    inserts rows with one statement per batch. Batches that still fail after
+    retrying are written to local fallback files instead of being dropped.
+    """
+
+    def __init__(self, batch_size: int = BATCH_SIZE, flush_interval: float = FLUSH_INTERVAL):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stop = object()
+        self._stopping = threading.Event()
+        self._schema_ready = False
+        # Batch the writer thread is inserting; whoever takes it (the thread
+        # on failure, or stop() if the thread outlives its join) falls back.
+        self._in_flight = None
+        self._in_flight_lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="kyc-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 20.0):
+        """Flush pending submissions and stop the writer thread."""
+        with self._lock:
+            self._stopping.set()
+            database_stuck = False
+            if self._thread and self._thread.is_alive():
+                self._queue.put(self._stop)
+                self._thread.join(timeout)
+                if self._thread.is_alive():
+                    # Still blocked in the database: save its batch locally
+                    # before the process exits and kills the thread.
+                    database_stuck = True
+                    self._fallback(self._take_in_flight())
+            self._thread = None
+            # Whatever the thread did not get to (or everything, if it never
+            # ran) is flushed here so shutdown never drops a submission.
+            pending = []
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not self._stop:
+                    pending.append(item)
+            if database_stuck:
+                self._fallback(pending)
+            elif pending:
+                self._flush(pending)
+
+    def enqueue(self, borrower_type: str, metadata: dict):
+        self._queue.put((borrower_type, metadata))
+        if not (self._thread and self._thread.is_alive()):
+            self.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is self._stop:
+                return
+            batch = [item]
+            stopping = False
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is self._stop:
+                    stopping = True
+                    break
+                batch.append(item)
+            with self._in_flight_lock:
+                self._in_flight = batch
+            if not self._write(batch):
+                self._fallback(self._take_in_flight())
+            self._take_in_flight()
+            # stop() owns whatever is left on the queue once it is called
+            if stopping or self._stopping.is_set():
+                return
+
+    def _take_in_flight(self):
+        with self._in_flight_lock:
+            batch, self._in_flight = self._in_flight, None
+        return batch or []
+
+    def _flush(self, batch: list):
+        """Write a batch from the calling thread, falling back on failure."""
+        if not self._write(batch):
+            self._fallback(batch)
+
+    def _write(self, batch: list) -> bool:
+        """Insert a batch, retrying with backoff. Returns False if it failed."""
+        rows = []
+        for borrower_type, metadata in batch:
+            try:
+                rows.append(build_row(borrower_type, metadata))
+            except (KeyError, ValueError) as e:
+                print(f"[kyc_store] Invalid {borrower_type} submission: {type(e).__name__}")
+                return False
+        for attempt in range(MAX_ATTEMPTS):
+            conn = None
+            try:
+                conn = get_db_connection(**WRITER_CONNECTION_OPTIONS)
+                if not self._schema_ready:
+                    ensure_schema(conn)
+                    self._schema_ready = True
+                insert_rows(rows, conn)
+                return True
+            except Exception as e:
+                # Only the error type is logged: messages can echo row values
+                print(f"[kyc_store] Insert of {len(batch)} submission(s) failed "
+                      f"(attempt {attempt + 1}/{MAX_ATTEMPTS}): {type(e).__name__}")
+            finally:
+                if conn is not None:
+                    conn.close()
+            # Waiting on the stop event cuts the backoff short at shutdown
+            if self._stopping.wait(RETRY_BACKOFF * 2 ** attempt):
+                break
+        return False
+
+    def _fallback(self, batch: list):
+        if not batch:
+            return
+        saved = 0
+        for borrower_type, metadata in batch:
+            try:
+                write_fallback(borrower_type, metadata)
+                saved += 1
+            except OSError as e:
+                print(f"[kyc_store] Fallback write failed: {type(e).__name__}")
+        print(f"[kyc_store] Saved {saved}/{len(batch)} submission(s) to {FALLBACK_DIR} "
+              f"for migrations.load_kyc_metadata")
+
+
+writer = SubmissionWriter()
+
+
+def latest_submission(borrower_type: str, column: str, value: str):
+    """Return the most recent submission matching `column` = `value`, or None."""
+    clause = LOOKUP_COLUMNS[column]
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            f"""
+            SELECT id, submitted_at, data
+            FROM kyc_submissions
+            WHERE borrower_type = %s AND {clause}
+            ORDER BY submitted_at DESC
+            LIMIT 1
+            """,
+            (borrower_type, value),
+        )
+        row = cursor.fetchone()
+    finally:
+        conn.close()
+
+    if not row:
+        return None
+    data = row[2] if isinstance(row[2], dict) else json.loads(row[2])
+    return {"id": row[0], "submitted_at": row[1].isoformat(), **data}
@@ -0,0 +1,410 @@
+# app/services/portfolio.py
+import numbers
+import re
+import threading
+
+import numpy as np
+
+from app.db import get_db_connection
+
+# Max probability of default per risk level, matching the score bands in
+# app.routes.credit_score.risk_classification (score = (1 - PD) * 100).
+RISK_LEVEL_MAX_PD = {"low": 0.2, "medium": 0.4, "high": 0.6, "very high": 1.0}
+
+# Loss given default; loans are unsecured so the full exposure is at risk.
+DEFAULT_LGD = 1.0
+
+# Loans the credit-score router has not scored yet are assumed to be priced
+# so that expected default losses take this share of their lifetime
+# interest. Their implied PD then leaves a positive expected yield of
+# (1 - share) * interest instead of a guaranteed loss.
+UNSCORED_LOSS_SHARE = 0.5
+
+# Only loans in these statuses are indexed and offered to lenders.
+OPEN_LOAN_STATUSES = ("open", "pending")
+
+INITIAL_CAPACITY = 1024
+
+
+def parse_repayment_period(value) -> int:
+    """Repayment period in months from a number of months or strings like
+    '6 months' or '2 years'. Raises ValueError for anything else.
+    """
+    if isinstance(value, numbers.Number):
+        # NUMERIC columns come back from psycopg2 as Decimal
+        months = int(value)
+        if months != value:
+            raise ValueError(f"Repayment period must be whole months: {value!r}")
+    else:
+        match = re.fullmatch(r"\s*(\d+)\s*(months?|mo|years?|yrs?)?\s*", str(value or ""), re.IGNORECASE)
+        if not match:
+            raise ValueError(f"Unrecognised repayment period: {value!r}")
+        months = int(match.group(1))
+        if (match.group(2) or "").lower().startswith("y"):
+            months *= 12
+    if months < 1:
+        raise ValueError(f"Repayment period must be at least one month: {value!r}")
+    return months
+
+
+# =========================
+# Vectorized risk maths
+# =========================
+
+def expected_loss(exposure, pd, lgd=DEFAULT_LGD):
+    """Expected loss per loan: PD * LGD * exposure."""
+    return np.asarray(pd) * lgd * np.asarray(exposure)
+
+
+def expected_yield(rate, periods, pd, lgd=DEFAULT_LGD):
+    """Expected return per unit lent over the loan's life, net of expected
+    default losses. PD is a whole-life figure, so it is weighed against the
+    total interest the amortization schedule pays, not the annual rate.
+    """
+    pd = np.asarray(pd)
+    interest = lifetime_interest(rate, periods)
+    return (1 - pd) * interest - pd * lgd
+
+
+def lifetime_interest(rate, periods):
+    """Total interest paid per unit lent over an annuity loan's life."""
+    periods = np.asarray(periods)
+    return periods * monthly_payment(1.0, rate, periods) - 1
+
+
+def implied_pd(rate, periods, lgd=DEFAULT_LGD, loss_share=UNSCORED_LOSS_SHARE):
+    """Whole-life PD at which expected losses take `loss_share` of the
+    interest, i.e. the PD the loan's rate prices in.
+    """
+    interest = lifetime_interest(rate, periods)
+    return loss_share * interest / (interest + lgd)
+
+
+def monthly_payment(principal, rate, periods):
+    """Level monthly instalment for annuity loans (rate is annual, in %)."""
+    principal = np.asarray(principal, dtype=float)
+    r = np.asarray(rate, dtype=float) / 1200
+    n = np.asarray(periods, dtype=float)
+    growth = (1 + r) ** n
+    with np.errstate(divide="ignore", invalid="ignore"):
+        annuity = principal * r * growth / (growth - 1)
+    return np.where(r > 0, annuity, principal / n)
+
+
+def amortization_schedule(principal, rate, periods):
+    """Month-by-month schedules for many loans at once.
+
+    Returns 2D arrays of shape (loans, longest period); months past a loan's
+    own term are zero.
+    """
+    principal = np.asarray(principal, dtype=float)
+    r = np.asarray(rate, dtype=float)[:, None] / 1200
+    n = np.asarray(periods, dtype=int)[:, None]
+    months = np.arange(1, int(n.max(initial=1)) + 1)[None, :]
+
+    growth_n = (1 + r) ** n
+    with np.errstate(divide="ignore", invalid="ignore"):
+        annuity_balance = principal[:, None] * (growth_n - (1 + r) ** months) / (growth_n - 1)
+    linear_balance = principal[:, None] * (1 - months / n)
+    balance = np.where(r > 0, annuity_balance, linear_balance)
+    balance = np.where(months <= n, np.clip(balance, 0, None), 0)
+
+    opening = np.hstack([principal[:, None], balance[:, :-1]])
+    opening = np.where(months <= n, opening, 0)
+    interest = opening * r
+    principal_paid = opening - balance
+    return {
+        "payment": interest + principal_paid,
+        "interest": interest,
+        "principal": principal_paid,
+        "balance": balance,
+    }
+
+
+# =========================
+# Loan Book
+# =========================
+
+class LoanBook:
+    """Array-backed index of loans for vectorized risk and matching.
+
+    Each loan occupies one slot across parallel NumPy arrays; `_slots` maps
+    loan ids to slots and the live loans are the first `size` entries.
+    """
+
+    def __init__(self, capacity: int = INITIAL_CAPACITY):
+        self.size = 0
+        self._slots = {}
+        self._lock = threading.RLock()
+        self._allocate(capacity)
+
+    def _allocate(self, capacity: int):
+        old = getattr(self, "ids", None)
+        arrays = {
+            "ids": np.zeros(capacity, dtype=np.int64),
+            "amount": np.zeros(capacity),
+            "funded": np.zeros(capacity),
+            "rate": np.zeros(capacity),
+            "period": np.ones(capacity, dtype=np.int64),
+            "pd": np.zeros(capacity),
+        }
+        if old is not None:
+            for name, array in arrays.items():
+                array[:self.size] = getattr(self, name)[:self.size]
+        for name, array in arrays.items():
+            setattr(self, name, array)
+
+    def __len__(self):
+        return self.size
+
+    def upsert(self, loan_id: int, amount: float, rate: float, repayment_period,
+               funded: float = 0.0, pd: float = None):
+        """Add a loan or overwrite its terms."""
+        period = parse_repayment_period(repayment_period)
+        with self._lock:
+            slot = self._slots.get(loan_id)
+            if slot is None:
+                if self.size == len(self.ids):
+                    self._allocate(2 * len(self.ids))
+                slot = self.size
+                self._slots[loan_id] = slot
+                self.size += 1
+            self.ids[slot] = loan_id
+            self.amount[slot] = amount
+            self.funded[slot] = funded
+            self.rate[slot] = rate
+            self.period[slot] = period
+            self.pd[slot] = float(implied_pd(rate, period)) if pd is None else pd
+
+    def set_funded(self, loan_id: int, funded: float):
+        """Set a loan's total funded amount; unknown loans are ignored.
+
+        Funding only grows, so a stale total read before a later funding
+        record never lowers the stored one.
+        """
+        with self._lock:
+            slot = self._slots.get(loan_id)
+            if slot is not None:
+                self.funded[slot] = max(self.funded[slot], funded)
+
+    def set_probability_of_default(self, loan_id: int, pd: float):
+        """Set a loan's probability of default; unknown loans are ignored."""
+        with self._lock:
+            slot = self._slots.get(loan_id)
+            if slot is not None:
+                self.pd[slot] = pd
+
+    def view(self, loan_id: int) -> dict:
+        with self._lock:
+            slot = self._slots.get(loan_id)
+            if slot is None:
+                return None
+            return {
+                "loan_id": loan_id,
+                "amount": float(self.amount[slot]),
+                "funded": float(self.funded[slot]),
+                "remaining": float(max(self.amount[slot] - self.funded[slot], 0)),
+                "rate": float(self.rate[slot]),
+                "repayment_period": int(self.period[slot]),
+                "probability_of_default": float(self.pd[slot]),
+            }
+
+    def remaining(self):
+        n = self.size
+        return np.clip(self.amount[:n] - self.funded[:n], 0, None)
+
+    def summary(self, lgd: float = DEFAULT_LGD) -> dict:
+        """Expected loss and lifetime yield across all open loans, weighted by
+        remaining amount.
+        """
+        with self._lock:
+            n = self.size
+            remaining = self.remaining()
+            open_mask = remaining > 0
+            exposure = remaining[open_mask]
+            pd = self.pd[:n][open_mask]
+            rate = self.rate[:n][open_mask]
+            period = self.period[:n][open_mask]
+            total = float(exposure.sum())
+            losses = expected_loss(exposure, pd, lgd)
+            yields = expected_yield(rate, period, pd, lgd)
+        return {
+            "loan_count": n,
+            "open_loan_count": int(open_mask.sum()),
+            "open_amount": total,
+            "expected_loss": float(losses.sum()),
+            "expected_yield": float((yields * exposure).sum() / total) if total else 0.0,
+            "weighted_probability_of_default": float((pd * exposure).sum() / total) if total else 0.0,
+        }
+
+    def match(self, budget: float, max_pd: float = 1.0, min_rate: float = 0.0,
+              max_rate: float = None, max_repayment_period: int = None,
+              max_share_per_loan: float = 1.0, max_loans: int = None,
+              min_expected_yield: float = None, lgd: float = DEFAULT_LGD) -> dict:
+        """Allocate `budget` across open loans that satisfy the constraints.
+
+        Eligible loans are ranked by lifetime expected yield and filled
+        greedily; if `min_expected_yield` is given, loans at or below it are
+        skipped. No loan receives more than `max_share_per_loan` of the
+        budget or more than its remaining amount.
+        """
+        with self._lock:
+            n = self.size
+            remaining = self.remaining()
+            rate = self.rate[:n]
+            pd = self.pd[:n]
+            eligible = (remaining > 0) & (pd <= max_pd) & (rate >= min_rate)
+            if max_rate is not None:
+                eligible &= rate <= max_rate
+            if max_repayment_period is not None:
+                eligible &= self.period[:n] <= max_repayment_period
+
+            slots = np.flatnonzero(eligible)
+            ids = self.ids[slots]
+            rate = rate[slots]
+            pd = pd[slots]
+            period = self.period[slots]
+            caps = np.minimum(remaining[slots], budget * max_share_per_loan)
+
+        yields = expected_yield(rate, period, pd, lgd)
+        order = np.argsort(-yields, kind="stable")
+        if min_expected_yield is not None:
+            order = order[yields[order] > min_expected_yield]
+        if max_loans is not None:
+            order = order[:max_loans]
+
+        caps = caps[order]
+        filled_before = np.cumsum(caps) - caps
+        allocation = np.minimum(caps, np.clip(budget - filled_before, 0, None))
+        taken = allocation > 0
+        order = order[taken]
+        allocation = allocation[taken]
+
+        pd = pd[order]
+        losses = expected_loss(allocation, pd, lgd)
+        yields = yields[order]
+        allocated = float(allocation.sum())
+
+        return {
+            "budget": budget,
+            "allocated": allocated,
+            "unallocated": budget - allocated,
+            "loan_count": int(allocation.size),
+            "expected_loss": float(losses.sum()),
+            "expected_yield": float((yields * allocation).sum() / allocated) if allocated else 0.0,
+            "weighted_probability_of_default": float((pd * allocation).sum() / allocated) if allocated else 0.0,
+            "allocations": [
+                {
+                    "loan_id": int(loan_id),
+                    "amount": float(amount),
+                    "rate": float(r),
+                    "repayment_period": int(p),
+                    "probability_of_default": float(d),
+                    "expected_loss": float(loss),
+                    "expected_yield": float(y),
+                }
+                for loan_id, amount, r, p, d, loss, y in zip(
+                    ids[order], allocation, rate[order], period[order], pd, losses, yields
+                )
+            ],
+        }
+
+
+def load_book() -> LoanBook:
+    """Build a LoanBook from the open loans and their funding records.
+
+    Needs the loans.probability_of_default column from
+    migrations.add_loan_probability_of_default.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        SELECT l.id, l.amount, l.rate, l.repayment_period, l.probability_of_default,
+               COALESCE(SUM(f.amount), 0)
+        FROM loans l
+        LEFT JOIN funding f ON f.loan_id = l.id
+        WHERE lower(l.status) IN %s
+        GROUP BY l.id, l.amount, l.rate, l.repayment_period, l.probability_of_default
+    """,
+        (OPEN_LOAN_STATUSES,),
+    )
+    rows = cursor.fetchall()
+    cursor.execute(
+        "SELECT status, COUNT(*) FROM loans WHERE lower(status) NOT IN %s OR status IS NULL GROUP BY status",
+        (OPEN_LOAN_STATUSES,),
+    )
+    excluded = cursor.fetchall()
+    conn.close()
+
+    # Surfaces status values the filter does not know about instead of
+    # silently loading an empty book
+    if excluded:
+        counts = ", ".join(f"{status}: {count}" for status, count in excluded)
+        print(f"[portfolio] Not indexing {sum(c for _, c in excluded)} loan(s) outside "
+              f"{OPEN_LOAN_STATUSES} ({counts})")
+
+    loan_book = LoanBook(capacity=max(INITIAL_CAPACITY, len(rows)))
+    for loan_id, amount, rate, repayment_period, pd, funded in rows:
+        try:
+            loan_book.upsert(
+                loan_id, float(amount), float(rate), repayment_period,
+                funded=float(funded), pd=None if pd is None else float(pd),
+            )
+        except ValueError as e:
+            print(f"[portfolio] Skipping loan {loan_id}: {e}")
+    print(f"[portfolio] Loaded {len(loan_book)} open loan(s)")
+    return loan_book
+
+
+_book = None
+_book_lock = threading.Lock()
+
+
+def get_book(reload: bool = False) -> LoanBook:
+    """Process-wide loan book, loaded from the database on first use."""
+    global _book
+    with _book_lock:
+        if _book is None or reload:
+            _book = load_book()
+        return _book
+
+
+def refresh_funding(conn, loan_id: int):
+    """Update the loaded book with a loan's funded total after a funding
+    record is committed on `conn`.
+
+    The total is read outside the book lock and set rather than added, so a
+    reload racing with the funding commit cannot count it twice. Failures
+    are logged, not raised: the funding itself is already committed.
+    """
+    book = _book
+    if book is None:
+        return
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COALESCE(SUM(amount), 0) FROM funding WHERE loan_id = %s", (loan_id,))
+        funded = cursor.fetchone()[0]
+        # A reload may have swapped books while the query ran
+        (_book or book).set_funded(loan_id, float(funded))
+    except Exception as e:
+        print(f"[portfolio] Could not refresh funding for loan {loan_id}: {e}")
+
+
+def save_probability_of_default(loan_id: int, pd: float) -> bool:
+    """Store a loan's probability of default and apply it to the loaded book.
+
+    Returns False if the loan does not exist.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        "UPDATE loans SET probability_of_default = %s WHERE id = %s RETURNING id",
+        (pd, loan_id),
+    )
+    updated = cursor.fetchone()
+    conn.commit()
+    conn.close()
+    if updated and _book is not None:
+        _book.set_probability_of_default(loan_id, pd)
+    return updated is not None
@@ -0,0 +1,28 @@
+"""One-off migration: add loans.probability_of_default for the portfolio engine.
+
+Run from the backend directory, as a role that owns the loans table:
+
+    python -m migrations.add_loan_probability_of_default
+
+The app reads and writes this column but never alters the table itself.
+"""
+from app.db import get_db_connection
+
+SCHEMA_SQL = """
+ALTER TABLE loans ADD COLUMN IF NOT EXISTS probability_of_default NUMERIC
+"""
+
+
+def main():
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(SCHEMA_SQL)
+        conn.commit()
+    finally:
+        conn.close()
+    print("loans.probability_of_default is in place.")
+
+
+if __name__ == "__main__":
+    main()
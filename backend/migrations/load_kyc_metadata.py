@@ -0,0 +1,60 @@
+"""One-off migration: bulk-load uploads/*/<name>/*_metadata.json into kyc_submissions.
+
+Run from the backend directory:
+
+    python -m migrations.load_kyc_metadata [uploads_dir]
+
+Submissions already present (same borrower type, name and timestamp) are
+skipped, so the script is safe to re-run. It also reloads submissions the
+background writer saved as fallback files while the database was down.
+Files that cannot be read or are missing a name or timestamp are reported
+and skipped; the rest still load.
+"""
+import glob
+import json
+import os
+import sys
+
+from app.db import get_db_connection
+from app.services.kyc_store import BORROWER_FOLDERS, build_row, ensure_schema, insert_rows
+
+
+def collect_rows(uploads_dir: str) -> tuple:
+    """Return (rows, paths of files that could not be loaded)."""
+    rows, bad_files = [], []
+    for borrower_type, folder in BORROWER_FOLDERS.items():
+        pattern = os.path.join(uploads_dir, folder, "*", "*_metadata.json")
+        for path in sorted(glob.glob(pattern)):
+            try:
+                with open(path, encoding="utf-8") as mf:
+                    metadata = json.load(mf)
+                if not metadata.get("timestamp"):
+                    # Older files only carry the timestamp in their filename
+                    metadata["timestamp"] = os.path.basename(path).split("_", 1)[0]
+                rows.append(build_row(borrower_type, metadata))
+            except (OSError, ValueError, KeyError, AttributeError) as e:
+                bad_files.append(path)
+                print(f"Skipping {path}: {type(e).__name__}: {e}")
+    return rows, bad_files
+
+
+def main(uploads_dir: str = "uploads"):
+    rows, bad_files = collect_rows(uploads_dir)
+
+    conn = get_db_connection()
+    try:
+        ensure_schema(conn)
+        cursor = conn.cursor()
+        cursor.execute("SELECT borrower_type, name, submitted_at FROM kyc_submissions")
+        existing = set(cursor.fetchall())
+        new_rows = [row for row in rows if row[:2] + row[4:5] not in existing]
+        insert_rows(new_rows, conn)
+    finally:
+        conn.close()
+
+    print(f"Loaded {len(new_rows)} submission(s), skipped {len(rows) - len(new_rows)} already present "
+          f"and {len(bad_files)} unreadable file(s).")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
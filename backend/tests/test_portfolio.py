@@ -0,0 +1,83 @@
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from app.services.portfolio import (
+    LoanBook,
+    amortization_schedule,
+    expected_yield,
+    implied_pd,
+    monthly_payment,
+    parse_repayment_period,
+)
+
+
+def unscored_book(count=50):
+    book = LoanBook()
+    for loan_id in range(count):
+        rate = [10, 14, 20, 30][loan_id % 4]
+        book.upsert(loan_id, 1000.0, rate, 6 + loan_id % 19)
+    return book
+
+
+def test_match_allocates_across_unscored_book():
+    result = unscored_book().match(5000, max_share_per_loan=0.1)
+
+    assert result["loan_count"] > 0
+    assert result["allocated"] == pytest.approx(5000)
+    assert all(a["amount"] <= 500 + 1e-9 for a in result["allocations"])
+
+
+def test_unscored_loans_have_positive_expected_yield():
+    rates = np.array([10, 14, 20, 30])
+    periods = np.array([24, 12, 6, 3])
+    pd = implied_pd(rates, periods)
+
+    assert np.all(expected_yield(rates, periods, pd) > 0)
+
+
+def test_min_expected_yield_is_opt_in():
+    book = LoanBook()
+    book.upsert(1, 1000.0, 10, 12, pd=0.5)
+    book.upsert(2, 1000.0, 30, 12)
+
+    assert book.match(1500)["loan_count"] == 2
+    result = book.match(1500, min_expected_yield=0.0)
+    assert [a["loan_id"] for a in result["allocations"]] == [2]
+
+
+def test_match_respects_budget_and_remaining():
+    book = unscored_book(4)
+    book.set_funded(0, 900.0)
+    book.set_funded(0, 100.0)  # stale totals never lower funding
+
+    result = book.match(10_000)
+    amounts = {a["loan_id"]: a["amount"] for a in result["allocations"]}
+
+    assert amounts[0] == pytest.approx(100)
+    assert result["allocated"] == pytest.approx(3100)
+    assert result["unallocated"] == pytest.approx(6900)
+
+
+def test_amortization_schedule_repays_principal():
+    principal = np.array([1000.0, 1200.0])
+    schedule = amortization_schedule(principal, np.array([12.0, 0.0]), np.array([12, 6]))
+
+    assert schedule["principal"].sum(axis=1) == pytest.approx(principal)
+    assert schedule["balance"][:, -1] == pytest.approx([0, 0])
+    assert schedule["payment"][0, 0] == pytest.approx(monthly_payment(1000.0, 12.0, 12))
+    assert schedule["payment"][1, 6:] == pytest.approx([0] * 6)
+
+
+@pytest.mark.parametrize("value, months", [
+    (6, 6), (Decimal("6.0"), 6), ("6 months", 6), ("2 years", 24), ("1 yr", 12),
+])
+def test_parse_repayment_period(value, months):
+    assert parse_repayment_period(value) == months
+
+
+@pytest.mark.parametrize("value", ["soon", "2 weeks", 0, Decimal("6.5")])
+def test_parse_repayment_period_rejects(value):
+    with pytest.raises(ValueError):
+        parse_repayment_period(value)